@@ -32,112 +32,91 @@
 import math
 import matplotlib.pyplot as plt
 
-from meshing import *
+from meshing import create_equal_cell_mesh_left_fixed
 from material import SS304L, CuCrZr
+from kernels import step, step_scipy
 
 SS304L = SS304L()
 CuCrZr = CuCrZr()
 
+#from meshing import create_equal_cell_mesh
 #mesh = create_equal_cell_mesh(30, 20, 1, 30, 30, 10, CuCrZr, (273+25), (273+550), (273+400), (273+25), (273+25))
 mesh = create_equal_cell_mesh_left_fixed(30, 20, 1, 30, 30, 10, CuCrZr, (273+25), (273+550))
 
 def dist(pos1, pos2):
     return math.sqrt((pos2[0] - pos1[0])**2 + (pos2[1] - pos1[1])**2 + (pos2[2] - pos1[2])**2)
 
-def conduct_differential_heat_on_mesh(mesh, dt):
-    n_x = mesh.n_x
-    n_y = mesh.n_y
-    n_z = mesh.n_z
-
-    dTs = []
-
-    for z_i in range(len(mesh.cells)):
-        for y_i in range(len(mesh.cells[0])):
-            for x_i in range(len(mesh.cells[0][0])):
-                cell_i_x, cell_i_y, cell_i_z = x_i, y_i, z_i
-                cell = mesh.get_cell(x_i, y_i, z_i)
-
-                if not cell.is_fixed():
-                    cell_left = mesh.get_cell(cell_i_x - 1, cell_i_y, cell_i_z)
-                    cell_right = mesh.get_cell(cell_i_x + 1, cell_i_y, cell_i_z)
-                    cell_front = mesh.get_cell(cell_i_x, cell_i_y - 1, cell_i_z)
-                    cell_rear = mesh.get_cell(cell_i_x, cell_i_y + 1, cell_i_z)
-
-                    dx = dist(cell.get_pos(), cell_left.get_pos()) * 0.001 # convert from mm to m
-                    dy = dist(cell.get_pos(), cell_front.get_pos()) * 0.001 # convert from mm to m
-
-                    T_c = cell.get_T()
-                    
-                    if cell_left:
-                        T_left = cell_left.get_T()
-                    else:
-                        T_left = T_c
-
-                    if cell_right:
-                        T_right = cell_right.get_T()
-                    else:
-                        T_right = T_c
-
-                    if cell_front:
-                        T_front = cell_front.get_T()
-                    else:
-                        T_front = T_c
-
-                    if cell_rear:
-                        T_rear = cell_rear.get_T()
-                    else:
-                        T_rear = T_c
-                    
-                    k = cell.get_thermal_conductivity()
-                    rho = cell.get_density()
-                    spec_heat = cell.get_spec_heat()
-
-                    alpha = k/(rho * spec_heat) # thermal diffusivity
-                    dT = alpha * (((T_left - 2*T_c + T_right)/(dx**2)) + ((T_front - 2*T_c + T_rear)/(dy**2))) * dt
-                    dTs.append(dT)
-                else:
-                    # boundary cell, no temperature change
-                    dTs.append(0)
-
-    return dTs
+def conduct_differential_heat_on_mesh(mesh, dt, T, T_next, n_steps=1):
+    # runs n_steps time steps, taking turns reading one of T and T_next
+    # and writing the other (see kernels.step)
+
+    # cell size is constant throughout the analysis, and stencil neighbors
+    # differ along a single axis, so their distance is just the cell length
+    dx = mesh.L[0] * 0.001 # convert from mm to m
+    dy = mesh.L[1] * 0.001 # convert from mm to m
+    dx2 = dx*dx
+    dy2 = dy*dy
+
+    # equal-cell mesh of a single material, so the thermal diffusivity is the same
+    # all over the mesh for materials with constant properties, and whole blocks
+    # of n_steps can run in one kernel call
+    # otherwise each cell has its own diffusivity, found again every step
+    alpha = mesh.get_thermal_diffusivity(T)
+
+    x_start, x_end = mesh.x_free
+    y_start, y_end = mesh.y_free
+
+    if mesh.mtl.constant_properties:
+        # coefficients take the precision of the temperature field
+        alpha_dt_over_dx2 = T.dtype.type(alpha * dt/dx2)
+        alpha_dt_over_dy2 = T.dtype.type(alpha * dt/dy2)
+
+        step(T, T_next, alpha_dt_over_dx2, alpha_dt_over_dy2,
+             x_start, x_end, y_start, y_end, n_steps)
+    else:
+        alpha_dt_over_dx2 = (alpha * dt/dx2).astype(T.dtype)
+        alpha_dt_over_dy2 = (alpha * dt/dy2).astype(T.dtype)
+
+        step_scipy(T, T_next, alpha_dt_over_dx2, alpha_dt_over_dy2,
+                   x_start, x_end, y_start, y_end, n_steps)
+
+# maximum number of time steps run in a single kernel call
+TIME_BLOCK = 1000
 
 def conduct_heat_in_time_interval(mesh, time_end, dt=0.001):
+    # double buffering, each time step reads T and writes T_next
+    T = mesh.T
+    T_next = mesh.T.copy()
+
+    # constant properties do not need to be updated between the time steps,
+    # so whole blocks of steps can be run in one kernel call
+    if mesh.mtl.constant_properties:
+        time_block = TIME_BLOCK
+    else:
+        time_block = 1
+    
     time = 0
     while time < time_end:
-        
-        dTs = conduct_differential_heat_on_mesh(mesh, dt)
-
-        i = 0
-        for z_i in range(len(mesh.cells)):
-            for y_i in range(len(mesh.cells[0])):
-                for x_i in range(len(mesh.cells[0][0])):
 
-                    cell = mesh.get_cell(x_i, y_i, z_i)
-                    cell.T += dTs[i]
-
-                    i += 1
+        # count the steps of the block the same way as the time loop
+        n_steps = 0
+        while time < time_end and n_steps < time_block:
+            time += dt
+            n_steps += 1
+        
+        conduct_differential_heat_on_mesh(mesh, dt, T, T_next, n_steps)
+        if n_steps % 2:
+            T, T_next = T_next, T
 
-        time += dt
+    if T is not mesh.T:
+        mesh.T[:] = T
 
 conduct_heat_in_time_interval(mesh, 10, 0.01)
 
 def plot_mesh_T(mesh):
-    xs = []
-    ys = []
-    Ts = []
-
-    for x_i in range(mesh.n_x):
-        xs.append(mesh.get_cell(x_i, 0, 0).get_pos()[0])
-
-    for y_i in range(mesh.n_y):
-        ys.append(mesh.get_cell(0, y_i, 0).get_pos()[1])
-
-    for y_i in range(mesh.n_y):
-        Ts.append([])
-        for x_i in range(mesh.n_x):
-            cell = mesh.get_cell(x_i, y_i, 0)
-            T = cell.get_T()
-            Ts[y_i].append(T)
+    xs = mesh.pos_x[0, :]
+    ys = mesh.pos_y[:, 0]
+    Ts = mesh.T
 
     clrplot = plt.contourf(xs, ys, Ts)
     cplot = plt.contour(xs, ys, Ts, colors="k")
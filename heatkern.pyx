@@ -0,0 +1,53 @@
+# - - - - - - - - - - - - - - - - - - - - - - - -
+# heatkern.pyx
+# Cython stencil kernel for transient heat transfer analysis
+# - - - - - - - - - - - - - - - - - - - - - - - -
+# Glossary
+# T: temperature
+# T_next: temperature after the time step
+# adx: thermal diffusivity * time step / (cell length in x)^2
+# ady: thermal diffusivity * time step / (cell length in y)^2
+# n: number (of something)
+# _i: index (of whatever comes before the underscore)
+# - - - - - - - - - - - - - - - - - - - - - - - -
+# Built on import through pyximport, compiler flags are in heatkern.pyxbld
+# - - - - - - - - - - - - - - - - - - - - - - - -
+
+# cython: language_level=3
+# cython: boundscheck=False, wraparound=False, cdivision=True
+
+from cython.parallel cimport prange
+
+ctypedef fused real:
+    float
+    double
+
+# same time steps as kernels.step_numba(), rows are contiguous so that
+# the inner x loop can be vectorized by the C compiler
+# rows are shared out to OpenMP threads if parallel is set
+# works on float32 and float64 fields
+def step(real[:, ::1] T, real[:, ::1] T_next, real adx, real ady,
+         int x_start, int x_end, int y_start, int y_end, int n_steps=1, bint parallel=False):
+    cdef int n_y = T.shape[0]
+    cdef int n_x = T.shape[1]
+    cdef int step_i, x_i, y_i, x_left, x_right, y_front, y_rear
+    cdef real T_c
+    cdef real[:, ::1] T_swap
+
+    for step_i in range(n_steps):
+        for y_i in prange(y_start, y_end, nogil=True, schedule="static", use_threads_if=parallel):
+            y_front = y_i - 1 if y_i > 0 else 0
+            y_rear = y_i + 1 if y_i < n_y - 1 else n_y - 1
+
+            for x_i in range(x_start, x_end):
+                x_left = x_i - 1 if x_i > 0 else 0
+                x_right = x_i + 1 if x_i < n_x - 1 else n_x - 1
+
+                T_c = T[y_i, x_i]
+                T_c = T_c + (adx * (T[y_i, x_left] - 2*T_c + T[y_i, x_right]) +
+                             ady * (T[y_front, x_i] - 2*T_c + T[y_rear, x_i]))
+                T_next[y_i, x_i] = T_c
+
+        T_swap = T
+        T = T_next
+        T_next = T_swap
@@ -0,0 +1,201 @@
+# - - - - - - - - - - - - - - - - - - - - - - - -
+# kernels.py
+# Compiled stencil kernels for transient heat transfer analysis
+# - - - - - - - - - - - - - - - - - - - - - - - -
+# Glossary
+# T: temperature
+# T_next: temperature after the time step
+# adx: thermal diffusivity * time step / (cell length in x)^2
+# ady: thermal diffusivity * time step / (cell length in y)^2
+# n: number (of something)
+# _i: index (of whatever comes before the underscore)
+# - - - - - - - - - - - - - - - - - - - - - - - -
+# Unless otherwise specified:
+# All length units are in m
+# All temperature units are in K
+# All time units are in s
+# - - - - - - - - - - - - - - - - - - - - - - - -
+
+import numpy as np
+import scipy.ndimage
+
+# numba is optional, the SciPy kernel is used without it
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+# cupy is optional, large meshes are run on the GPU with it
+# (cupy imports fine without a usable GPU, so the device is checked as well)
+try:
+    import cupy
+    import cupyx.scipy.ndimage
+except ImportError:
+    cupy = None
+else:
+    if not cupy.is_available():
+        cupy = None
+
+# meshes with fewer cells than this are swept on one thread,
+# starting the threads would take longer than the sweep itself
+PARALLEL_MIN_CELLS = 10000
+
+# meshes with fewer cells than this stay on the CPU even if cupy is available,
+# the transfers and kernel launches would take longer than the sweeps
+GPU_MIN_CELLS = 100000
+
+# explicit time steps of the 5-point stencil on a 2D temperature field
+# the n_steps time steps take turns reading one of T and T_next and writing the other,
+# so the result ends up in T_next for an odd n_steps and in T for an even n_steps
+# only the non-fixed cells, which span [y_start, y_end) x [x_start, x_end), are written
+# non-fixed edges are insulated (the missing neighbor takes the cell's own temperature)
+def step_numba(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps):
+    n_y, n_x = T.shape
+
+    # the whole block of steps runs without returning to Python,
+    # and small fields stay in cache between the steps
+    for step_i in range(n_steps):
+        for y_i in prange(y_start, y_end):
+            y_front = max(y_i - 1, 0)
+            y_rear = min(y_i + 1, n_y - 1)
+
+            for x_i in range(x_start, x_end):
+                x_left = max(x_i - 1, 0)
+                x_right = min(x_i + 1, n_x - 1)
+
+                # (T_c + T_c) rather than 2*T_c, an integer literal would
+                # promote float32 fields to float64 arithmetic
+                T_c = T[y_i, x_i]
+                T_c = T_c + (adx * (T[y_i, x_left] - (T_c + T_c) + T[y_i, x_right]) +
+                             ady * (T[y_front, x_i] - (T_c + T_c) + T[y_rear, x_i]))
+                T_next[y_i, x_i] = T_c
+
+        T, T_next = T_next, T
+
+# same time steps as step_numba(), dispatched to the compiled loops of scipy.ndimage
+# ("nearest" mode repeats the edge cells, which keeps non-fixed edges insulated)
+# also runs on GPU arrays when given cupyx.scipy.ndimage as ndimage
+# adx and ady can also be arrays of the same shape as T, for per-cell diffusivity
+def step_scipy(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps, ndimage=scipy.ndimage):
+    for step_i in range(n_steps):
+        if np.ndim(adx) == 0 and adx == ady:
+            # uniform grid, both axial differences in one call
+            dT = adx * ndimage.laplace(T, mode="nearest")
+        else:
+            dT = (adx * ndimage.correlate1d(T, [1, -2, 1], axis=1, mode="nearest") +
+                  ady * ndimage.correlate1d(T, [1, -2, 1], axis=0, mode="nearest"))
+
+        T_next[y_start:y_end, x_start:x_end] = T[y_start:y_end, x_start:x_end] + dT[y_start:y_end, x_start:x_end]
+
+        T, T_next = T_next, T
+
+# same time steps as step_scipy(), on the GPU
+# the field is copied to the GPU and back once per call, not once per step
+def step_cupy(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps):
+    T_gpu = cupy.asarray(T)
+    T_next_gpu = cupy.asarray(T_next)
+
+    step_scipy(T_gpu, T_next_gpu, adx, ady, x_start, x_end, y_start, y_end, n_steps,
+               ndimage=cupyx.scipy.ndimage)
+
+    if n_steps % 2:
+        T_next[:] = T_next_gpu.get()
+    else:
+        T[:] = T_gpu.get()
+
+# Cython kernel, compiled on first import when Cython and a C compiler are available
+# (the pyximport import hook is only kept in place while heatkern is imported)
+def load_step_cython():
+    try:
+        import pyximport
+    except ImportError:
+        return None
+
+    importers = pyximport.install(language_level=3)
+    try:
+        from heatkern import step as step_cython
+    except ImportError:
+        return None
+    finally:
+        pyximport.uninstall(*importers)
+
+    return step_cython
+
+# explicit signatures compile the Numba kernel on import for C-contiguous
+# float32 and float64 fields (unit stride along x is known to the compiler),
+# cache keeps the compiled code on disk between runs
+STEP_SIGNATURES = ["void(f4[:, ::1], f4[:, ::1], f4, f4, i8, i8, i8, i8, i8)",
+                   "void(f8[:, ::1], f8[:, ::1], f8, f8, i8, i8, i8, i8, i8)"]
+
+if njit is not None:
+    step_numba_parallel = njit(STEP_SIGNATURES, parallel=True, fastmath=True, cache=True)(step_numba)
+    step_numba_serial = njit(STEP_SIGNATURES, fastmath=True, cache=True)(step_numba)
+
+    def step(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps=1):
+        if T.size >= PARALLEL_MIN_CELLS:
+            return step_numba_parallel(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps)
+
+        return step_numba_serial(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps)
+
+else:
+    step_cython = load_step_cython()
+
+    if step_cython:
+        def step(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps=1):
+            return step_cython(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps,
+                               T.size >= PARALLEL_MIN_CELLS)
+
+    else:
+        def step(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps=1):
+            return step_scipy(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps)
+
+if cupy is not None:
+    step_cpu = step
+
+    def step(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps=1):
+        if T.size >= GPU_MIN_CELLS:
+            return step_cupy(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps)
+
+        return step_cpu(T, T_next, adx, ady, x_start, x_end, y_start, y_end, n_steps)
+
+# checks the available kernels against the SciPy kernel,
+# run with: python kernels.py
+if __name__ == "__main__":
+    kernels = {}
+    if njit is not None:
+        kernels["numba (serial)"] = step_numba_serial
+        kernels["numba (parallel)"] = step_numba_parallel
+
+    step_cython = load_step_cython()
+    if step_cython:
+        kernels["cython (serial)"] = lambda *args: step_cython(*args, False)
+        kernels["cython (parallel)"] = lambda *args: step_cython(*args, True)
+
+    rng = np.random.default_rng(0)
+
+    for dtype, tolerance in ((np.float64, 1e-9), (np.float32, 1e-3)):
+        for n_y, n_x in ((20, 30), (200, 300)):
+            # fixed boundary on all sides, and on the left side only
+            for x_start, x_end, y_start, y_end in ((1, n_x - 1, 1, n_y - 1), (1, n_x, 0, n_y)):
+                for n_steps in (1, 4, 7):
+                    T_initial = (298 + 525 * rng.random((n_y, n_x))).astype(dtype)
+                    adx = dtype(0.1)
+                    ady = dtype(0.2)
+                    args = (adx, ady, x_start, x_end, y_start, y_end, n_steps)
+
+                    T = T_initial.copy()
+                    T_next = T_initial.copy()
+                    step_scipy(T, T_next, *args)
+                    T_ref = T_next if n_steps % 2 else T
+
+                    for name, kernel in kernels.items():
+                        T = T_initial.copy()
+                        T_next = T_initial.copy()
+                        kernel(T, T_next, *args)
+                        T_result = T_next if n_steps % 2 else T
+
+                        error = np.abs(T_result - T_ref).max()
+                        assert error < tolerance, (name, dtype.__name__, n_y, n_x, n_steps, error)
+
+    print("checked against step_scipy:", ", ".join(kernels) or "no compiled kernels available")
@@ -1,7 +1,8 @@
 import math
 
 class material:
-    pass
+    # set if thermal conductivity and specific heat do not change with temperature
+    constant_properties = False
 
 # stainless steel 304L
 # References: Choong S. Kim - Thermophysical Properties of Stainless Steels
@@ -56,6 +57,8 @@ class SS304L(material):
 #
 # (Only data available was between 25 - 500 degrees C)
 class CuCrZr(material):
+    constant_properties = True
+
     def __init__(self):
         self.name = "Copper-Chromium-Zirconium"
 
@@ -29,48 +29,106 @@
 # All time units are in s
 # - - - - - - - - - - - - - - - - - - - - - - - -
 
+import numpy as np
+
 from material import CuCrZr, SS304L, Jet_A1
 CuCrZr = CuCrZr()
 SS304L = SS304L()
 Jet_A1 = Jet_A1()
 
+# the mesh stores each cell property as an array of its own,
+# indexed [y_i, x_i]
+# (the analysis is 2D, the mesh is a single layer of cells in z)
 class mesh:
-    def __init__(self, n_x, n_y, n_z, cells):
+    def __init__(self, n_x, n_y, n_z, L, mtl, T, fixed):
+        assert n_z == 1, "only 2D meshes (n_z = 1) are supported"
+
         self.n_x = n_x
         self.n_y = n_y
         self.n_z = n_z
-        self.cells = cells
+
+        # equal cell mesh of a single material
+        self.L = L
+        self.mtl = mtl
+
+        self.T = T
+        self.fixed = fixed
+
+        # non-fixed cells span the index ranges [start, end) on each axis,
+        # the stencil kernels only sweep this rectangle
+        free = ~fixed
+        free_y_i = np.flatnonzero(free.any(axis=1))
+        free_x_i = np.flatnonzero(free.any(axis=0))
+
+        if len(free_y_i):
+            self.y_free = (int(free_y_i[0]), int(free_y_i[-1]) + 1)
+            self.x_free = (int(free_x_i[0]), int(free_x_i[-1]) + 1)
+        else:
+            self.y_free = (0, 0)
+            self.x_free = (0, 0)
+
+        # (the ranges bound every non-fixed cell, so they must not hold any fixed ones)
+        assert free[self.y_free[0]:self.y_free[1], self.x_free[0]:self.x_free[1]].all(), \
+               "non-fixed cells must form a rectangle"
+
+        self.pos_y, self.pos_x = np.meshgrid(np.arange(n_y) * L[1],
+                                             np.arange(n_x) * L[0],
+                                             indexing="ij")
+
+        # cell views for per-cell access, made on first access to each cell
+        # (the analysis and the plotting only work on the arrays)
+        self.cells = {}
+
+        # single material, so density (and constant properties) are the same
+        # all over the mesh, temperature dependent properties are found cell by cell
+        self.rho = mtl.get_density()
+        if mtl.constant_properties:
+            self.k = mtl.get_thermal_conductivity(float(T.mean()))
+            self.spec_heat = mtl.get_specific_heat(float(T.mean()))
+
+    # returns thermal diffusivity (m2 s-1) of the cells at temperatures T,
+    # a single value for materials with constant properties
+    def get_thermal_diffusivity(self, T):
+        if self.mtl.constant_properties:
+            return self.k/(self.rho * self.spec_heat)
+
+        k = np.vectorize(self.mtl.get_thermal_conductivity, otypes=[np.float64])(T)
+        spec_heat = np.vectorize(self.mtl.get_specific_heat, otypes=[np.float64])(T)
+        return k/(self.rho * spec_heat)
 
     def get_cell(self, index_x, index_y, index_z):
-        try:
-            return self.cells[index_z][index_y][index_x]
-        except:
-            return None
+        if 0 <= index_x < self.n_x and 0 <= index_y < self.n_y and 0 <= index_z < self.n_z:
+            if (index_x, index_y) not in self.cells:
+                self.cells[(index_x, index_y)] = cell(self, [index_x, index_y, 0])
+
+            return self.cells[(index_x, index_y)]
+
+        return None
 
 # a cell is a 3D cube of material
+# (a view into the mesh arrays at the cell's index)
 class cell:
-    def __init__(self, index, pos, size, mtl, temp, fixed=False):
+    __slots__ = ("mesh", "index", "L_x", "L_y", "L_z")
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
         self.index = index
-        self.pos = pos
-        self.mtl = mtl
-        self.T = temp
-        self.fixed = fixed
 
         # size[0] = x -- towards right
         # size[1] = y -- into secreen
         # size[2] = z -- upwards
 
-        self.L_x = size[0]
-        self.L_y = size[1]
-        self.L_z = size[2]
-        
-        self.A_x = size[1] * size[2]
-        self.A_y = size[0] * size[2]
-        self.A_z = size[0] * size[1]
+        self.L_x = mesh.L[0]
+        self.L_y = mesh.L[1]
+        self.L_z = mesh.L[2]
+
+    @property
+    def T(self):
+        return self.mesh.T[self.index[1], self.index[0]]
 
-        self.V = size[0] * size[1] * size[2]
-        self.m = self.mtl.get_density() * self.V/(1000000000) # this is now in kg
-        self.m *= 1000 # now in grams
+    @T.setter
+    def T(self, temp):
+        self.mesh.T[self.index[1], self.index[0]] = temp
 
     def get_index(self):
         return self.index
@@ -79,93 +137,74 @@ class cell:
         return self.T
 
     def get_A_x(self):
-        return self.A_x
+        return self.L_y * self.L_z
 
     def get_A_y(self):
-        return self.A_y
+        return self.L_x * self.L_z
 
     def get_A_z(self):
-        return self.A_z
+        return self.L_x * self.L_y
 
     def get_V(self):
-        return self.V
+        return self.L_x * self.L_y * self.L_z
 
     def get_m(self):
-        return self.m
+        m = self.mesh.rho * self.get_V()/(1000000000) # this is now in kg
+        return m * 1000 # now in grams
 
     def get_pos(self):
-        return self.pos
+        x_i, y_i, z_i = self.index
+        return [self.mesh.pos_x[y_i, x_i],
+                self.mesh.pos_y[y_i, x_i],
+                self.L_z * z_i]
 
     def get_heat_cpc(self):
-        return self.mtl.get_specific_heat(self.T) * self.mass
+        return self.get_spec_heat() * self.get_m()
 
     def get_spec_heat(self):
-        return self.mtl.get_specific_heat(self.T)
+        return self.mesh.mtl.get_specific_heat(self.T)
 
     def get_density(self):
-        return self.mtl.get_density()
+        return self.mesh.rho
 
     def get_thermal_conductivity(self):
-        return self.mtl.get_thermal_conductivity(self.T)
+        return self.mesh.mtl.get_thermal_conductivity(self.T)
 
     def is_fixed(self):
-        return self.fixed
-
-def create_equal_cell_mesh(n_x, n_y, n_z, L_x, L_y, L_z, mtl, T_in, T_left, T_right, T_front, T_rear):
+        return self.mesh.fixed[self.index[1], self.index[0]]
+
+# dtype sets the precision of the temperature field (for both mesh builders)
+# np.float32 halves the memory traffic, but temperature changes below its resolution
+# (about 6e-5 K near 800 K) are rounded away, and the error grows with the number of steps
+# on the 30x20 example meshes, it is off from np.float64 by up to about 4e-3 K after
+# 10 s at dt = 0.01, 2e-2 K after 10 s at dt = 0.001 and 0.16 K after 60 s at dt = 0.001
+def create_equal_cell_mesh(n_x, n_y, n_z, L_x, L_y, L_z, mtl, T_in, T_left, T_right, T_front, T_rear, dtype=np.float64):
     
-    cells = []
-    
-    for z_i in range(n_z):
-        cells.append([])
-        for y_i in range(n_y):
-            cells[z_i].append([])
-            for x_i in range(n_x):
-                
-                new_cell_pos = [L_x * x_i,
-                                L_y * y_i,
-                                L_z * z_i]
-
-                # boundary conditions for boundary cells
-                if x_i == 0:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_left, True)
-                elif x_i == n_x - 1:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_right, True)
-                elif y_i == 0:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_front, True)
-                elif y_i == n_y - 1:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_rear, True)
-
-                # inner region cell
-                else:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_in)
-                    
-                cells[z_i][y_i].append(new_cell)
-
-    new_mesh = mesh(n_x, n_y, n_z, cells)
+    T = np.full((n_y, n_x), T_in, dtype=dtype)
+    fixed = np.zeros((n_y, n_x), dtype=bool)
+
+    # boundary conditions for boundary cells
+    T[:, 0] = T_left
+    T[:, n_x - 1] = T_right
+    T[0, 1:n_x - 1] = T_front
+    T[n_y - 1, 1:n_x - 1] = T_rear
+
+    fixed[:, 0] = True
+    fixed[:, n_x - 1] = True
+    fixed[0, :] = True
+    fixed[n_y - 1, :] = True
+
+    new_mesh = mesh(n_x, n_y, n_z, (L_x, L_y, L_z), mtl, T, fixed)
     return new_mesh
 
-def create_equal_cell_mesh_left_fixed(n_x, n_y, n_z, L_x, L_y, L_z, mtl, T_in, T_left):
-    
-    cells = []
+def create_equal_cell_mesh_left_fixed(n_x, n_y, n_z, L_x, L_y, L_z, mtl, T_in, T_left, dtype=np.float64):
     
-    for z_i in range(n_z):
-        cells.append([])
-        for y_i in range(n_y):
-            cells[z_i].append([])
-            for x_i in range(n_x):
-                
-                new_cell_pos = [L_x * x_i,
-                                L_y * y_i,
-                                L_z * z_i]
-
-                # boundary conditions for boundary cells (left side cells)
-                if x_i == 0:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_left, True)
-
-                else:
-                    new_cell = cell([x_i, y_i, z_i], new_cell_pos, [L_x, L_y, L_z], mtl, T_in)
-                    
-                cells[z_i][y_i].append(new_cell)
-
-    new_mesh = mesh(n_x, n_y, n_z, cells)
+    T = np.full((n_y, n_x), T_in, dtype=dtype)
+    fixed = np.zeros((n_y, n_x), dtype=bool)
+
+    # boundary conditions for boundary cells (left side cells)
+    T[:, 0] = T_left
+    fixed[:, 0] = True
+
+    new_mesh = mesh(n_x, n_y, n_z, (L_x, L_y, L_z), mtl, T, fixed)
     return new_mesh